@@ -0,0 +1,104 @@
+import asyncio
+import os
+
+from fastapi import HTTPException
+from starlette import status
+
+ROUTE_GROUP_DEFAULTS = {
+    "project": {"max_concurrency": 64, "max_queue": 256, "max_time_ms": 2000},
+    "task": {"max_concurrency": 64, "max_queue": 256, "max_time_ms": 2000},
+    "collaborator": {"max_concurrency": 64, "max_queue": 256, "max_time_ms": 2000},
+    "task_write": {"max_concurrency": 1000, "max_queue": 1000, "max_time_ms": 2000},
+    "statistic": {"max_concurrency": 4, "max_queue": 16, "max_time_ms": 10000},
+}
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "5"))
+RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "2"))
+
+
+def _setting(group: str, name: str) -> int:
+    value = os.getenv(f"ADMISSION_{group.upper()}_{name.upper()}")
+    return int(value) if value else ROUTE_GROUP_DEFAULTS[group][name]
+
+
+def overloaded() -> HTTPException:
+    """
+    Retorna o erro 503 usado quando um grupo de rotas está sobrecarregado.
+    """
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Service overloaded, try again later.",
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+    )
+
+
+class AdmissionGate:
+    """
+    Limita as requisições simultâneas de um grupo de rotas.
+
+    Até `max_concurrency` requisições executam ao mesmo tempo e até
+    `max_queue` aguardam por uma vaga; com a fila cheia, ou após
+    `queue_timeout` segundos de espera, a requisição recebe 503.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int,
+                 queue_timeout: float):
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+
+    async def __call__(self):
+        if self._semaphore.locked() and self._waiting >= self.max_queue:
+            raise overloaded()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(
+                self._semaphore.acquire(), self.queue_timeout
+            )
+        except asyncio.TimeoutError:
+            raise overloaded()
+        finally:
+            self._waiting -= 1
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+
+_gates: dict[str, AdmissionGate] = {}
+
+
+def get_admission_gate(group: str) -> AdmissionGate:
+    """
+    Retorna o controle de admissão de um grupo de rotas.
+
+    Os limites podem ser ajustados com `ADMISSION_<GRUPO>_MAX_CONCURRENCY` e
+    `ADMISSION_<GRUPO>_MAX_QUEUE`.
+
+    Args:
+        group (str): Nome do grupo de rotas.
+
+    Returns:
+        AdmissionGate: Controle de admissão do grupo.
+    """
+    if group not in _gates:
+        _gates[group] = AdmissionGate(
+            max_concurrency=_setting(group, "max_concurrency"),
+            max_queue=_setting(group, "max_queue"),
+            queue_timeout=QUEUE_TIMEOUT_SECONDS
+        )
+    return _gates[group]
+
+
+def max_time_ms(group: str) -> int:
+    """
+    Retorna o orçamento `maxTimeMS` das consultas de um grupo de rotas,
+    ajustável com `ADMISSION_<GRUPO>_MAX_TIME_MS`.
+
+    Args:
+        group (str): Nome do grupo de rotas.
+
+    Returns:
+        int: Tempo máximo de execução no MongoDB, em milissegundos.
+    """
+    return _setting(group, "max_time_ms")
@@ -1,29 +1,58 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+
+from admission import get_admission_gate
+from write_behind import TASK_WRITE_BEHIND
 
 from .routes.project import router as project_router
+from .routes.project import events_router as project_events_router
 from .routes.task import router as task_router
+from .routes.task import write_router as task_write_router
 from .routes.collaborator import router as collaborator_router
 from .routes.statistic import router as statistic_router
 
 api_router = APIRouter()
 
+# Os streams SSE ficam abertos por tempo indeterminado e não passam pelo
+# controle de admissão, para não ocupar vagas do grupo "project". Incluído
+# antes de project_router para que "/projects/events" não case com
+# "/projects/{project_id}".
 api_router.include_router(
-    project_router,
+    project_events_router,
     prefix="/projects",
     tags=["Project"]
 )
+api_router.include_router(
+    project_router,
+    prefix="/projects",
+    tags=["Project"],
+    dependencies=[Depends(get_admission_gate("project"))]
+)
 api_router.include_router(
     task_router,
     prefix="/tasks",
-    tags=["Task"]
+    tags=["Task"],
+    dependencies=[Depends(get_admission_gate("task"))]
+)
+# Com write-behind, as atualizações de tarefas aguardam o flush do lote sem
+# ocupar uma conexão; elas usam um grupo próprio para não esgotar o grupo
+# "task" das leituras e da busca.
+api_router.include_router(
+    task_write_router,
+    prefix="/tasks",
+    tags=["Task"],
+    dependencies=[Depends(get_admission_gate(
+        "task_write" if TASK_WRITE_BEHIND else "task"
+    ))]
 )
 api_router.include_router(
     collaborator_router,
     prefix="/collaboratos",
-    tags=["Collaborator"]
+    tags=["Collaborator"],
+    dependencies=[Depends(get_admission_gate("collaborator"))]
     )
 api_router.include_router(
     statistic_router,
     prefix="/statistic",
-    tags=["Statistic"]
+    tags=["Statistic"],
+    dependencies=[Depends(get_admission_gate("statistic"))]
 )
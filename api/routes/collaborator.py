@@ -1,38 +1,138 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Response
 from odmantic import ObjectId
 from starlette import status
 
-from database import get_engine
+from admission import max_time_ms
+from archive import get_archive_collection
+from database import FANOUT_BATCH_SIZE, count_documents, get_engine
 from models import Collaborator, Project, Task
 
 router = APIRouter()
 
 engine = get_engine()
+listing_engine = get_engine("listing")
+
+
+async def _apply_fanout_in_batches(
+    collection,
+    collaborator_id: ObjectId,
+    update: dict,
+    array_filters: list[dict] | None = None
+) -> None:
+    """
+    Aplica a atualização das cópias embutidas do colaborador em lotes de
+    projetos, percorrendo-os em ordem de `_id`.
+
+    Args:
+        collection: Coleção de projetos (ativos ou arquivados).
+        collaborator_id (ObjectId): ID do colaborador.
+        update (dict): Operação de atualização a ser aplicada.
+        array_filters (list[dict], opcional): Filtros de array da operação.
+    """
+    last_id = None
+    while True:
+        query = {"tasks.collaborators.id": collaborator_id}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        cursor = collection.find(query, {"_id": 1}) \
+            .sort("_id", 1) \
+            .limit(FANOUT_BATCH_SIZE)
+        ids = [document["_id"] async for document in cursor]
+        if not ids:
+            break
+        await collection.update_many(
+            {"_id": {"$in": ids}},
+            update,
+            array_filters=array_filters
+        )
+        last_id = ids[-1]
+
+
+async def _fanout_to_projects(
+    collaborator_id: ObjectId,
+    update: dict,
+    background_tasks: BackgroundTasks,
+    array_filters: list[dict] | None = None
+) -> int:
+    """
+    Propaga uma alteração do colaborador para as tarefas dos projetos,
+    ativos e arquivados.
+
+    Em cada coleção, fan-outs pequenos são aplicados com um único
+    `update_many`; os maiores são agendados em lotes para não segurar a
+    requisição.
+
+    Args:
+        collaborator_id (ObjectId): ID do colaborador.
+        update (dict): Operação de atualização a ser aplicada.
+        background_tasks (BackgroundTasks): Tarefas executadas após a resposta.
+        array_filters (list[dict], opcional): Filtros de array da operação.
+
+    Returns:
+        int: Número de projetos afetados.
+    """
+    query = {"tasks.collaborators.id": collaborator_id}
+    affected = 0
+    for collection in (
+        engine.get_collection(Project), get_archive_collection()
+    ):
+        matched = await collection.count_documents(
+            query, limit=FANOUT_BATCH_SIZE + 1
+        )
+        if matched <= FANOUT_BATCH_SIZE:
+            result = await collection.update_many(
+                query, update, array_filters=array_filters
+            )
+            affected += result.modified_count
+        else:
+            background_tasks.add_task(
+                _apply_fanout_in_batches,
+                collection,
+                collaborator_id,
+                update,
+                array_filters
+            )
+            affected += await collection.count_documents(query)
+    return affected
 
 
 @router.get("/",
             response_model=list[Collaborator],
             status_code=status.HTTP_200_OK)
 async def find_all(
+    response: Response,
     skip: int = Query(default=0, ge=0),
-    limit: int = Query(default=5, le=100)
+    limit: int = Query(default=5, le=100),
+    include_total: bool = Query(default=False),
+    estimate: bool = Query(default=False)
 ) -> list[Collaborator]:
     """
     Retorna uma lista de colaboradores.
 
     Args:
+        response (Response): Resposta HTTP.
         skip (int): Número de registros a pular para paginação.
         limit (int): Número máximo de registros a retornar.
+        include_total (bool): Informa o total no header `X-Total-Count`.
+        estimate (bool): Aceita um total aproximado, lido dos metadados.
 
     Returns:
         list[Collaborator]: Lista de colaboradores cadastrados.
     """
-    collaborators = await engine.find(
+    collaborators = await listing_engine.find(
         Collaborator,
         skip=skip,
         limit=limit,
         sort=Collaborator.name
         )
+    if include_total:
+        total = await count_documents(
+            Collaborator,
+            estimate=estimate,
+            route_group="listing",
+            max_time_ms=max_time_ms("collaborator")
+        )
+        response.headers["X-Total-Count"] = str(total)
     return collaborators
 
 
@@ -41,16 +141,20 @@ async def find_all(
             status_code=status.HTTP_200_OK)
 async def find_collaborator_by_email(
     email: str,
+    response: Response,
     skip: int = Query(default=0, ge=0),
-    limit: int = Query(default=5, le=100)
+    limit: int = Query(default=5, le=100),
+    include_total: bool = Query(default=False)
 ) -> list[Collaborator]:
     """
     Busca colaboradores pelo email.
 
     Args:
         email (str): Email do colaborador (busca parcial, case-insensitive).
+        response (Response): Resposta HTTP.
         skip (int): Número de registros a pular para paginação.
         limit (int): Número máximo de registros a retornar.
+        include_total (bool): Informa o total no header `X-Total-Count`.
 
     Returns:
         list[Collaborator]: Lista de colaboradores encontrados.
@@ -58,9 +162,10 @@ async def find_collaborator_by_email(
     Raises:
         HTTPException: 404 se nenhum colaborador for encontrado.
     """
-    collaborators = await engine.find(
+    query = {"email": {"$regex": f"{email}", "$options": "i"}}
+    collaborators = await listing_engine.find(
         Collaborator,
-        {"email": {"$regex": f"{email}", "$options": "i"}},
+        query,
         skip=skip,
         limit=limit,
         sort=Collaborator.name
@@ -69,6 +174,14 @@ async def find_collaborator_by_email(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Collaborators not found.")
+    if include_total:
+        total = await count_documents(
+            Collaborator,
+            query,
+            route_group="listing",
+            max_time_ms=max_time_ms("collaborator")
+        )
+        response.headers["X-Total-Count"] = str(total)
     return collaborators
 
 
@@ -193,13 +306,21 @@ async def create(collaborator: Collaborator) -> Collaborator:
             response_model=Collaborator,
             status_code=status.HTTP_200_OK)
 async def update(collaborator_id: str,
-                 collaborator_data: Collaborator) -> Collaborator:
+                 collaborator_data: Collaborator,
+                 response: Response,
+                 background_tasks: BackgroundTasks) -> Collaborator:
     """
-    Atualiza um colaborador pelo ID.
+    Atualiza um colaborador pelo ID e propaga os campos alterados para as
+    cópias embutidas nas tarefas dos projetos.
+
+    O número de projetos afetados é informado no header
+    `X-Affected-Projects`.
 
     Args:
         collaborator_id (str): ID do colaborador.
         collaborator_data (Collaborator): Dados atualizados.
+        response (Response): Resposta HTTP.
+        background_tasks (BackgroundTasks): Tarefas executadas após a resposta.
 
     Returns:
         Collaborator: Objeto do colaborador atualizado.
@@ -211,22 +332,42 @@ async def update(collaborator_id: str,
         Collaborator, Collaborator.id == ObjectId(collaborator_id)
         )
     if not collaborator:
-        raise HTTPException(status=status.HTTP_404_NOT_FOUND,
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Collaborator not found.")
-    for key, value in collaborator_data.model_dump(exclude_unset=True).items():
+    changes = collaborator_data.model_dump(exclude_unset=True, exclude={"id"})
+    for key, value in changes.items():
         setattr(collaborator, key, value)
     await engine.save(collaborator)
+    affected = 0
+    if changes:
+        affected = await _fanout_to_projects(
+            collaborator.id,
+            {"$set": {
+                f"tasks.$[].collaborators.$[collaborator].{key}": value
+                for key, value in changes.items()
+            }},
+            background_tasks,
+            array_filters=[{"collaborator.id": collaborator.id}]
+        )
+    response.headers["X-Affected-Projects"] = str(affected)
     return collaborator
 
 
 @router.delete("/{collaborator_id}",
                status_code=status.HTTP_204_NO_CONTENT)
-async def delete(collaborator_id: str) -> None:
+async def delete(collaborator_id: str,
+                 response: Response,
+                 background_tasks: BackgroundTasks) -> None:
     """
-    Remove um colaborador pelo ID.
+    Remove um colaborador pelo ID e o retira das tarefas dos projetos.
+
+    O número de projetos afetados é informado no header
+    `X-Affected-Projects`.
 
     Args:
         collaborator_id (str): ID do colaborador.
+        response (Response): Resposta HTTP.
+        background_tasks (BackgroundTasks): Tarefas executadas após a resposta.
 
     Returns:
         None
@@ -238,7 +379,13 @@ async def delete(collaborator_id: str) -> None:
         Collaborator, Collaborator.id == ObjectId(collaborator_id)
         )
     if not collaborator:
-        raise HTTPException(status=status.HTTP_404_NOT_FOUND,
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Collaborator not found.")
     await engine.delete(collaborator)
+    affected = await _fanout_to_projects(
+        collaborator.id,
+        {"$pull": {"tasks.$[].collaborators": {"id": collaborator.id}}},
+        background_tasks
+    )
+    response.headers["X-Affected-Projects"] = str(affected)
     return
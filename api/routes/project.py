@@ -1,39 +1,135 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from odmantic import ObjectId
 from starlette import status
 from datetime import datetime, timezone
+import asyncio
 
-from database import get_engine
-from models import Project
+from admission import max_time_ms
+from archive import (
+    ARCHIVE_AFTER_DAYS,
+    archive_done_projects,
+    count_archivable_projects,
+    find_archived_project,
+    get_archive_collection
+)
+from change_feed import project_change_feed
+from database import count_documents, get_engine
+from models import Project, ProjectFilter, ProjectStatusTransition
 
 router = APIRouter()
+events_router = APIRouter()
 
 engine = get_engine()
+listing_engine = get_engine("listing")
+
+KEEPALIVE_SECONDS = 15
+
+
+def _build_project_query(project_filter: ProjectFilter) -> dict:
+    """
+    Converte o filtro de projetos em uma consulta do MongoDB.
+
+    Raises:
+        HTTPException: 400 se o filtro estiver vazio ou tiver IDs inválidos.
+    """
+    query = {}
+    if project_filter.ids is not None:
+        try:
+            query["_id"] = {
+                "$in": [ObjectId(project_id) for project_id in project_filter.ids]
+            }
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid project id."
+            )
+    if project_filter.status is not None:
+        query["status"] = project_filter.status.value
+    if project_filter.name is not None:
+        query["name"] = {"$regex": f"{project_filter.name}", "$options": "i"}
+    if project_filter.updated_before is not None:
+        query["updated_at"] = {"$lt": project_filter.updated_before}
+    if not query:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Filter must not be empty."
+        )
+    return query
+
+
+async def _event_stream(
+    request: Request,
+    project_id: ObjectId | None,
+    last_event_id: str | None
+):
+    """
+    Gera os eventos Server-Sent Events de um assinante do change feed.
+    """
+    queue = await project_change_feed.subscribe(project_id, last_event_id)
+    try:
+        while not await request.is_disconnected():
+            try:
+                event_id, event_type, data = await asyncio.wait_for(
+                    queue.get(), KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
+    finally:
+        project_change_feed.unsubscribe(project_id, queue)
+
+
+def _event_response(
+    request: Request,
+    project_id: ObjectId | None,
+    last_event_id: str | None
+) -> StreamingResponse:
+    return StreamingResponse(
+        _event_stream(request, project_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/",
             response_model=list[Project],
             status_code=status.HTTP_200_OK)
 async def find_all(
+    response: Response,
     skip: int = Query(default=0, ge=0),
-    limit: int = Query(default=5, le=100)
+    limit: int = Query(default=5, le=100),
+    include_total: bool = Query(default=False),
+    estimate: bool = Query(default=False)
 ) -> list[Project]:
     """
     Retorna uma lista de projetos.
 
     Args:
+        response (Response): Resposta HTTP.
         skip (int): Número de registros a pular para paginação.
         limit (int): Número máximo de registros a retornar.
+        include_total (bool): Informa o total no header `X-Total-Count`.
+        estimate (bool): Aceita um total aproximado, lido dos metadados.
 
     Returns:
         list[Project]: Lista de projetos cadastrados.
     """
-    projects = await engine.find(
+    projects = await listing_engine.find(
         Project,
         skip=skip,
         limit=limit,
         sort=Project.created_at
         )
+    if include_total:
+        total = await count_documents(
+            Project,
+            estimate=estimate,
+            route_group="listing",
+            max_time_ms=max_time_ms("project")
+        )
+        response.headers["X-Total-Count"] = str(total)
     return projects
 
 
@@ -42,16 +138,20 @@ async def find_all(
             status_code=status.HTTP_200_OK)
 async def find_project_by_name(
         name: str,
+        response: Response,
         skip: int = Query(default=0, ge=0),
-        limit: int = Query(default=5, le=100)
+        limit: int = Query(default=5, le=100),
+        include_total: bool = Query(default=False)
 ) -> list[Project]:
     """
     Busca projetos pelo nome.
 
     Args:
         name (str): Nome do projeto (busca parcial, case-insensitive).
+        response (Response): Resposta HTTP.
         skip (int): Número de registros a pular para paginação.
         limit (int): Número máximo de registros a retornar.
+        include_total (bool): Informa o total no header `X-Total-Count`.
 
     Returns:
         list[Project]: Lista de projetos encontrados.
@@ -59,9 +159,10 @@ async def find_project_by_name(
     Raises:
         HTTPException: 404 se nenhum projeto for encontrado.
     """
-    projects = await engine.find(
+    query = {"name": {"$regex": f"{name}", "$options": "i"}}
+    projects = await listing_engine.find(
         Project,
-        {"name": {"$regex": f"{name}", "$options": "i"}},
+        query,
         skip=skip,
         limit=limit,
         sort=Project.created_at
@@ -71,15 +172,196 @@ async def find_project_by_name(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found."
         )
+    if include_total:
+        total = await count_documents(
+            Project,
+            query,
+            route_group="listing",
+            max_time_ms=max_time_ms("project")
+        )
+        response.headers["X-Total-Count"] = str(total)
     return projects
 
 
+@router.put("/bulk/status",
+            response_model=dict,
+            status_code=status.HTTP_200_OK)
+async def bulk_update_status(
+    transition: ProjectStatusTransition,
+    dry_run: bool = Query(default=False)
+) -> dict:
+    """
+    Altera o status de todos os projetos que atendem ao filtro.
+
+    Args:
+        transition (ProjectStatusTransition): Filtro, novo status e se o
+            status deve ser aplicado também às tarefas dos projetos.
+        dry_run (bool): Apenas conta os projetos afetados, sem alterá-los.
+
+    Returns:
+        dict: Um dicionário no formato:
+        {
+            "matched_count": int,
+            "modified_count": int,
+            "dry_run": bool
+        }
+
+    Raises:
+        HTTPException: 400 se o filtro estiver vazio ou for inválido.
+    """
+    collection = engine.get_collection(Project)
+    query = _build_project_query(transition.filter)
+    if dry_run:
+        matched = await collection.count_documents(
+            query, maxTimeMS=max_time_ms("project")
+        )
+        return {"matched_count": matched, "modified_count": 0, "dry_run": True}
+
+    now = datetime.now(timezone.utc)
+    changes = {"status": transition.status.value, "updated_at": now}
+    if transition.cascade_tasks:
+        changes["tasks.$[].status"] = transition.status.value
+        changes["tasks.$[].updated_at"] = now
+    result = await collection.update_many(query, {"$set": changes})
+    return {
+        "matched_count": result.matched_count,
+        "modified_count": result.modified_count,
+        "dry_run": False
+    }
+
+
+@router.post("/bulk/delete",
+             response_model=dict,
+             status_code=status.HTTP_200_OK)
+async def bulk_delete(
+    project_filter: ProjectFilter,
+    dry_run: bool = Query(default=False)
+) -> dict:
+    """
+    Remove todos os projetos que atendem ao filtro.
+
+    Args:
+        project_filter (ProjectFilter): Filtro dos projetos a remover.
+        dry_run (bool): Apenas conta os projetos afetados, sem removê-los.
+
+    Returns:
+        dict: Um dicionário no formato:
+        {
+            "matched_count": int,
+            "deleted_count": int,
+            "dry_run": bool
+        }
+
+    Raises:
+        HTTPException: 400 se o filtro estiver vazio ou for inválido.
+    """
+    collection = engine.get_collection(Project)
+    query = _build_project_query(project_filter)
+    if dry_run:
+        matched = await collection.count_documents(
+            query, maxTimeMS=max_time_ms("project")
+        )
+        return {"matched_count": matched, "deleted_count": 0, "dry_run": True}
+
+    result = await collection.delete_many(query)
+    return {
+        "matched_count": result.deleted_count,
+        "deleted_count": result.deleted_count,
+        "dry_run": False
+    }
+
+
+@router.post("/archive",
+             response_model=dict,
+             status_code=status.HTTP_200_OK)
+async def archive(
+    older_than_days: int = Query(default=ARCHIVE_AFTER_DAYS, ge=0),
+    dry_run: bool = Query(default=False)
+) -> dict:
+    """
+    Move para o arquivo os projetos concluídos sem atualização há mais de
+    `older_than_days` dias.
+
+    Args:
+        older_than_days (int): Idade mínima, em dias, da última atualização.
+        dry_run (bool): Apenas conta os projetos, sem arquivá-los.
+
+    Returns:
+        dict: Um dicionário no formato:
+        {
+            "archived_count": int,
+            "dry_run": bool
+        }
+    """
+    if dry_run:
+        total = await count_archivable_projects(older_than_days)
+        return {"archived_count": total, "dry_run": True}
+    archived = await archive_done_projects(older_than_days)
+    return {"archived_count": archived, "dry_run": False}
+
+
+@events_router.get("/events",
+                  status_code=status.HTTP_200_OK)
+async def collection_events(
+    request: Request,
+    last_event_id: str | None = Header(default=None)
+) -> StreamingResponse:
+    """
+    Transmite as alterações de todos os projetos via Server-Sent Events.
+
+    Args:
+        request (Request): Requisição HTTP.
+        last_event_id (str, opcional): Header `Last-Event-ID` enviado pelo
+            cliente ao reconectar.
+
+    Returns:
+        StreamingResponse: Fluxo `text/event-stream` com um evento por
+        alteração, contendo apenas as tarefas alteradas.
+    """
+    return _event_response(request, None, last_event_id)
+
+
+@events_router.get("/{project_id}/events",
+                  status_code=status.HTTP_200_OK)
+async def project_events(
+    project_id: str,
+    request: Request,
+    last_event_id: str | None = Header(default=None)
+) -> StreamingResponse:
+    """
+    Transmite as alterações de um projeto via Server-Sent Events.
+
+    Args:
+        project_id (str): ID do projeto.
+        request (Request): Requisição HTTP.
+        last_event_id (str, opcional): Header `Last-Event-ID` enviado pelo
+            cliente ao reconectar.
+
+    Returns:
+        StreamingResponse: Fluxo `text/event-stream` com um evento por
+        alteração do projeto, contendo apenas as tarefas alteradas.
+
+    Raises:
+        HTTPException: 404 se o projeto não for encontrado.
+    """
+    project = await engine.find_one(
+        Project, Project.id == ObjectId(project_id)
+    )
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found."
+        )
+    return _event_response(request, project.id, last_event_id)
+
+
 @router.get("/{project_id}",
             response_model=Project,
             status_code=status.HTTP_200_OK)
 async def find_by_id(project_id: str) -> Project:
     """
-    Busca um projeto pelo ID.
+    Busca um projeto pelo ID, recorrendo ao arquivo se ele não estiver na
+    coleção de projetos ativos.
 
     Args:
         project_id (str): ID do projeto.
@@ -93,6 +375,8 @@ async def find_by_id(project_id: str) -> Project:
     project = await engine.find_one(
         Project, Project.id == ObjectId(project_id)
     )
+    if not project:
+        project = await find_archived_project(ObjectId(project_id))
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -153,7 +437,7 @@ async def update(project_id: str,
                status_code=status.HTTP_204_NO_CONTENT)
 async def delete(project_id: str) -> None:
     """
-    Remove um projeto pelo ID.
+    Remove um projeto pelo ID, ativo ou arquivado.
 
     Args:
         project_id (str): ID do projeto.
@@ -168,6 +452,11 @@ async def delete(project_id: str) -> None:
         Project, Project.id == ObjectId(project_id)
     )
     if not project:
+        result = await get_archive_collection().delete_one(
+            {"_id": ObjectId(project_id)}
+        )
+        if result.deleted_count:
+            return
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
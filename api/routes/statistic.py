@@ -1,27 +1,69 @@
 from fastapi import APIRouter, HTTPException, Query
 from bson import ObjectId
 from starlette import status
-from database import get_engine
+from admission import max_time_ms
+from archive import (
+    ARCHIVE_COLLECTION,
+    count_archived_projects,
+    get_archive_collection
+)
+from database import count_documents, get_engine
 from models import Project
 
 router = APIRouter()
-engine = get_engine()
+engine = get_engine("statistic")
+
+
+def _union_archive(
+    include_archived: bool,
+    archive_pipeline: list[dict] | None = None
+) -> list[dict]:
+    """
+    Retorna o estágio `$unionWith` que acrescenta os projetos arquivados ao
+    pipeline, ou uma lista vazia se eles não forem incluídos.
+    """
+    if not include_archived:
+        return []
+    return [{"$unionWith": {
+        "coll": ARCHIVE_COLLECTION,
+        "pipeline": archive_pipeline or []
+    }}]
 
 
 @router.get("/total/project",
             response_model=dict,
             status_code=status.HTTP_200_OK)
-async def total_projects() -> dict:
+async def total_projects(
+    estimate: bool = Query(False),
+    include_archived: bool = Query(False)
+) -> dict:
     """
     Obtém o número total de projetos cadastrados no banco de dados.
 
+    Args:
+        estimate (bool, opcional): Usa o total aproximado dos metadados da
+            coleção em vez de contar os documentos. Default = False.
+        include_archived (bool, opcional): Inclui os projetos arquivados.
+            Default = False.
+
     Returns:
         dict: Um dicionário contendo o total de projetos no formato:
         {
             "total_projects": int
         }
     """
-    total_projects = await engine.count(Project)
+    total_projects = await count_documents(
+        Project,
+        estimate=estimate,
+        route_group="statistic",
+        max_time_ms=max_time_ms("statistic")
+    )
+    if include_archived:
+        total_projects += await count_archived_projects(
+            estimate=estimate,
+            route_group="statistic",
+            max_time_ms=max_time_ms("statistic")
+        )
     return {"total_projects": total_projects}
 
 
@@ -32,7 +74,8 @@ async def total_tasks_by_project(
     min_tasks: int = Query(0, alias="min"),
     max_tasks: int = Query(None, alias="max"),
     limit: int = Query(10),
-    skip: int = Query(0)
+    skip: int = Query(0),
+    include_archived: bool = Query(False)
 ) -> list[dict]:
     """
     Retorna o número total de tarefas dentro de cada projeto.
@@ -42,6 +85,7 @@ async def total_tasks_by_project(
         max_tasks (int, opcional): Número máximo de tarefas por projeto.
         limit (int, opcional): Número máximo de projetos retornados. Default = 10.
         skip (int, opcional): Número de projetos a serem ignorados no início da lista. Default = 0.
+        include_archived (bool, opcional): Inclui os projetos arquivados. Default = False.
 
     Returns:
         list[dict]: Lista de dicionários contendo o nome do projeto e o total de tarefas.
@@ -49,6 +93,7 @@ async def total_tasks_by_project(
     collection = engine.get_collection(Project)
 
     pipeline = [
+        *_union_archive(include_archived),
         {"$project": {
             "_id": {"$toString": "$_id"},
             "project_name": "$name",
@@ -65,7 +110,9 @@ async def total_tasks_by_project(
         {"$limit": limit}
     ]
 
-    results = await collection.aggregate(pipeline).to_list(length=None)
+    results = await collection.aggregate(
+        pipeline, maxTimeMS=max_time_ms("statistic")
+    ).to_list(length=None)
     return results
 
 
@@ -77,7 +124,8 @@ async def total_collaborators_by_task(
     min_collaborators: int = Query(0, alias="min"),
     max_collaborators: int = Query(None, alias="max"),
     limit: int = Query(10),
-    skip: int = Query(0)
+    skip: int = Query(0),
+    include_archived: bool = Query(False)
 ) -> list[dict]:
     """
     Obtém a quantidade de colaboradores por tarefa dentro de um projeto específico.
@@ -88,6 +136,7 @@ async def total_collaborators_by_task(
         max_collaborators (int, opcional): Número máximo de colaboradores por tarefa.
         limit (int, opcional): Número máximo de resultados retornados. Default = 10.
         skip (int, opcional): Número de tarefas a serem ignoradas no início da lista. Default = 0.
+        include_archived (bool, opcional): Busca o projeto também entre os arquivados. Default = False.
 
     Returns:
         list[dict]: Lista de dicionários contendo o ID da tarefa, nome da tarefa e total de colaboradores.
@@ -97,9 +146,14 @@ async def total_collaborators_by_task(
     """
     collection = engine.get_collection(Project)
 
+    project_match = {"_id": ObjectId(project_id)}
     project = await engine.find_one(
         Project, Project.id == ObjectId(project_id)
         )
+    if not project and include_archived:
+        project = await get_archive_collection("statistic").find_one(
+            project_match, {"_id": 1}
+        )
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -107,7 +161,8 @@ async def total_collaborators_by_task(
         )
 
     pipeline = [
-        {"$match": {"_id": ObjectId(project_id)}},
+        {"$match": project_match},
+        *_union_archive(include_archived, [{"$match": project_match}]),
         {"$unwind": "$tasks"},
         {"$project": {
             "_id": 0,
@@ -130,7 +185,9 @@ async def total_collaborators_by_task(
         {"$limit": limit}
     ]
 
-    results = await collection.aggregate(pipeline).to_list(length=None)
+    results = await collection.aggregate(
+        pipeline, maxTimeMS=max_time_ms("statistic")
+    ).to_list(length=None)
     return results
 
 
@@ -141,7 +198,8 @@ async def total_tasks_by_collaborator(
     min_tasks: int = Query(0, alias="min"),
     max_tasks: int = Query(None, alias="max"),
     limit: int = Query(10),
-    skip: int = Query(0)
+    skip: int = Query(0),
+    include_archived: bool = Query(False)
 ) -> list[dict]:
     """
     Obtém o número total de tarefas atribuídas a cada colaborador.
@@ -151,6 +209,7 @@ async def total_tasks_by_collaborator(
         max_tasks (int, opcional): Número máximo de tarefas por colaborador.
         limit (int, opcional): Número máximo de resultados retornados. Default = 10.
         skip (int, opcional): Número de colaboradores a serem ignorados no início da lista. Default = 0.
+        include_archived (bool, opcional): Inclui as tarefas dos projetos arquivados. Default = False.
 
     Returns:
         list[dict]: Lista de dicionários contendo o nome do colaborador, e-mail e total de tarefas.
@@ -158,6 +217,7 @@ async def total_tasks_by_collaborator(
     collection = engine.get_collection(Project)
 
     pipeline = [
+        *_union_archive(include_archived),
         {"$unwind": "$tasks"},
         {"$unwind": "$tasks.collaborators"},
         {"$lookup": {
@@ -191,5 +251,7 @@ async def total_tasks_by_collaborator(
         {"$limit": limit}
     ]
 
-    results = await collection.aggregate(pipeline).to_list(length=None)
+    results = await collection.aggregate(
+        pipeline, maxTimeMS=max_time_ms("statistic")
+    ).to_list(length=None)
     return results
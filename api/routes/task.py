@@ -1,14 +1,192 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
 from odmantic import ObjectId
 from starlette import status
 from datetime import datetime, timezone
 
-from database import get_engine
-from models import Project, Task
+from admission import max_time_ms
+from database import cached_count, get_engine
+from models import Project, StatusEnum, Task
+from write_behind import TASK_WRITE_BEHIND, task_write_buffer
 
 router = APIRouter()
+write_router = APIRouter()
 
 engine = get_engine()
+listing_engine = get_engine("listing")
+
+
+def _parse_cursor(cursor: str) -> tuple[ObjectId, int]:
+    """
+    Converte o cursor de paginação no par (ID do projeto, posição da tarefa).
+
+    Raises:
+        HTTPException: 400 se o cursor for inválido.
+    """
+    try:
+        project_id, task_index = cursor.split(":")
+        return ObjectId(project_id), int(task_index)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor."
+        )
+
+
+@router.get("/search",
+            response_model=dict,
+            status_code=status.HTTP_200_OK)
+async def search(
+    response: Response,
+    task_status: StatusEnum | None = Query(None, alias="status"),
+    collaborator_id: str | None = Query(None),
+    collaborator_email: str | None = Query(None),
+    created_from: datetime | None = Query(None),
+    created_to: datetime | None = Query(None),
+    updated_from: datetime | None = Query(None),
+    updated_to: datetime | None = Query(None),
+    cursor: str | None = Query(None),
+    limit: int = Query(default=20, ge=1, le=100),
+    include_total: bool = Query(default=False)
+) -> dict:
+    """
+    Busca tarefas de todos os projetos por status, colaborador e datas.
+
+    Args:
+        response (Response): Resposta HTTP.
+        task_status (StatusEnum, opcional): Status das tarefas.
+        collaborator_id (str, opcional): ID de um colaborador da tarefa.
+        collaborator_email (str, opcional): Email de um colaborador da tarefa.
+        created_from (datetime, opcional): Data mínima de criação.
+        created_to (datetime, opcional): Data máxima de criação.
+        updated_from (datetime, opcional): Data mínima de atualização.
+        updated_to (datetime, opcional): Data máxima de atualização.
+        cursor (str, opcional): Cursor retornado pela página anterior.
+        limit (int): Número máximo de tarefas retornadas. Default = 20.
+        include_total (bool): Informa o total no header `X-Total-Count`.
+
+    Returns:
+        dict: Dicionário no formato:
+        {
+            "items": list[dict],
+            "next_cursor": str | None
+        }
+        onde cada item contém a tarefa e o ID e nome do projeto.
+
+    Raises:
+        HTTPException: 400 se o cursor ou o ID do colaborador forem inválidos.
+    """
+    task_filter = {}
+    if task_status is not None:
+        task_filter["status"] = task_status.value
+    if collaborator_id is not None:
+        if not ObjectId.is_valid(collaborator_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid collaborator id."
+            )
+        task_filter["collaborators.id"] = ObjectId(collaborator_id)
+    if collaborator_email is not None:
+        task_filter["collaborators.email"] = collaborator_email
+    for field, lower, upper in (
+        ("created_at", created_from, created_to),
+        ("updated_at", updated_from, updated_to)
+    ):
+        if lower is not None or upper is not None:
+            task_filter[field] = {
+                **({"$gte": lower} if lower is not None else {}),
+                **({"$lte": upper} if upper is not None else {})
+            }
+
+    project_match = {}
+    if task_filter:
+        project_match["tasks"] = {"$elemMatch": task_filter}
+    task_match = {f"tasks.{key}": value for key, value in task_filter.items()}
+
+    collection = listing_engine.get_collection(Project)
+    if include_total:
+        count_pipeline = [
+            {"$match": dict(project_match)},
+            {"$unwind": "$tasks"},
+            {"$match": dict(task_match)},
+            {"$count": "total"}
+        ]
+
+        async def count_tasks() -> int:
+            counted = await collection.aggregate(
+                count_pipeline, maxTimeMS=max_time_ms("task")
+            ).to_list(1)
+            return counted[0]["total"] if counted else 0
+
+        total = await cached_count(["task_search", task_filter], count_tasks)
+        response.headers["X-Total-Count"] = str(total)
+
+    if cursor is not None:
+        last_project_id, last_task_index = _parse_cursor(cursor)
+        project_match["_id"] = {"$gte": last_project_id}
+        task_match["$or"] = [
+            {"_id": {"$gt": last_project_id}},
+            {"_id": last_project_id, "task_index": {"$gt": last_task_index}}
+        ]
+
+    pipeline = [
+        {"$match": project_match},
+        {"$sort": {"_id": 1}},
+        {"$project": {"name": 1, "tasks": 1}},
+        {"$unwind": {"path": "$tasks", "includeArrayIndex": "task_index"}},
+        {"$match": task_match},
+        {"$limit": limit + 1},
+        {"$project": {
+            "_id": 0,
+            "project_id": {"$toString": "$_id"},
+            "project_name": "$name",
+            "task_index": 1,
+            "task": {
+                "id": {"$toString": "$tasks.id"},
+                "name": "$tasks.name",
+                "description": "$tasks.description",
+                "created_at": "$tasks.created_at",
+                "updated_at": "$tasks.updated_at",
+                "status": "$tasks.status",
+                "collaborators": {"$map": {
+                    "input": {"$ifNull": ["$tasks.collaborators", []]},
+                    "as": "collaborator",
+                    "in": {
+                        "id": {"$toString": "$$collaborator.id"},
+                        "name": "$$collaborator.name",
+                        "email": "$$collaborator.email",
+                        "function": "$$collaborator.function"
+                    }
+                }}
+            }
+        }}
+    ]
+
+    results = await collection.aggregate(
+        pipeline, maxTimeMS=max_time_ms("task")
+    ).to_list(length=None)
+
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        last = results[-1]
+        next_cursor = f"{last['project_id']}:{last['task_index']}"
+    for result in results:
+        result.pop("task_index")
+    return {"items": results, "next_cursor": next_cursor}
+
+
+@router.get("/write-behind/metrics",
+            response_model=dict,
+            status_code=status.HTTP_200_OK)
+async def write_behind_metrics() -> dict:
+    """
+    Retorna as métricas do modo write-behind de atualização de tarefas.
+
+    Returns:
+        dict: Um dicionário com o estado do modo e os tamanhos dos lotes
+        gravados.
+    """
+    return {"enabled": TASK_WRITE_BEHIND, **task_write_buffer.metrics()}
 
 
 @router.get("/{task_id}/project/{project_id}",
@@ -86,9 +264,39 @@ async def create(
     return project
 
 
-@router.put("/{task_id}/project/{project_id}",
-            response_model=Project,
-            status_code=status.HTTP_200_OK)
+async def _buffered_update(
+    task_id: str,
+    project_id: str,
+    task_data: Task
+) -> Project:
+    """
+    Atualiza a tarefa pelo buffer de write-behind.
+
+    Raises:
+        HTTPException: 404 se o projeto ou a tarefa não forem encontrados.
+    """
+    task_data.updated_at = datetime.now(timezone.utc)
+    changes = task_data.model_dump(exclude_unset=True, exclude={"id"})
+    document = await task_write_buffer.submit(
+        ObjectId(project_id), ObjectId(task_id), changes
+    )
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    project = Project.model_validate_doc(document)
+    if not any(task.id == ObjectId(task_id) for task in project.tasks):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found."
+        )
+    return project
+
+
+@write_router.put("/{task_id}/project/{project_id}",
+                  response_model=Project,
+                  status_code=status.HTTP_200_OK)
 async def update(
     task_id: str,
     project_id: str,
@@ -97,6 +305,10 @@ async def update(
     """
     Atualiza os detalhes de uma tarefa dentro de um projeto.
 
+    Com `TASK_WRITE_BEHIND` ativo, a atualização é agrupada com as demais
+    recebidas na mesma janela e gravada em um único `bulk_write`; a resposta
+    é enviada após a gravação do lote.
+
     Args:
         task_id (str): ID da tarefa a ser atualizada.
         project_id (str): ID do projeto ao qual a tarefa pertence.
@@ -108,6 +320,8 @@ async def update(
     Raises:
         HTTPException: 404 se o projeto ou a tarefa não forem encontrados.
     """
+    if TASK_WRITE_BEHIND:
+        return await _buffered_update(task_id, project_id, task_data)
     project = await engine.find_one(
         Project, Project.id == ObjectId(project_id)
     )
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from pymongo import DeleteOne, ReplaceOne
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+from database import cached_count, get_engine
+from models import Project, StatusEnum
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_COLLECTION = "project_archive"
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_COMPRESSOR = os.getenv("ARCHIVE_COMPRESSOR", "")
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "0"))
+
+
+def get_archive_collection(route_group: str | None = None):
+    """
+    Retorna a coleção de projetos arquivados.
+
+    Args:
+        route_group (str, opcional): Grupo de rotas que define a read
+            preference da leitura.
+    """
+    return get_engine(route_group).database[ARCHIVE_COLLECTION]
+
+
+async def ensure_archive_collection() -> None:
+    """
+    Cria a coleção de arquivo, com o compressor de blocos definido em
+    `ARCHIVE_COMPRESSOR` (por exemplo `zstd`), se ela ainda não existir, e o
+    índice usado na propagação das alterações de colaboradores.
+    """
+    database = get_engine().database
+    options = {}
+    if ARCHIVE_COMPRESSOR:
+        options["storageEngine"] = {"wiredTiger": {
+            "configString": f"block_compressor={ARCHIVE_COMPRESSOR}"
+        }}
+    try:
+        await database.create_collection(ARCHIVE_COLLECTION, **options)
+    except CollectionInvalid:
+        pass
+    await database[ARCHIVE_COLLECTION].create_index("tasks.collaborators.id")
+
+
+def _archive_query(older_than_days: int) -> dict:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    return {"status": StatusEnum.DONE.value, "updated_at": {"$lt": cutoff}}
+
+
+async def count_archivable_projects(older_than_days: int) -> int:
+    """
+    Conta os projetos concluídos que seriam arquivados.
+
+    Args:
+        older_than_days (int): Idade mínima, em dias, da última atualização.
+
+    Returns:
+        int: Número de projetos.
+    """
+    collection = get_engine().get_collection(Project)
+    return await collection.count_documents(_archive_query(older_than_days))
+
+
+async def archive_done_projects(
+    older_than_days: int = ARCHIVE_AFTER_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE
+) -> int:
+    """
+    Move para a coleção de arquivo, em lotes, os projetos concluídos cuja
+    última atualização é mais antiga que `older_than_days`.
+
+    Cada lote é copiado com upserts (a cópia é idempotente) e só então
+    removido da coleção `project`, desde que não tenha sido alterado desde a
+    cópia; os projetos alterados nesse intervalo permanecem ativos e suas
+    cópias são removidas do arquivo.
+
+    Args:
+        older_than_days (int): Idade mínima, em dias, da última atualização.
+        batch_size (int): Número de projetos por lote.
+
+    Returns:
+        int: Número de projetos arquivados.
+    """
+    collection = get_engine().get_collection(Project)
+    archive = get_archive_collection()
+    query = _archive_query(older_than_days)
+    archived = 0
+    while True:
+        documents = await collection.find(query) \
+            .sort("_id", 1) \
+            .limit(batch_size) \
+            .to_list(length=None)
+        if not documents:
+            break
+        archived_at = datetime.now(timezone.utc)
+        await archive.bulk_write([
+            ReplaceOne(
+                {"_id": document["_id"]},
+                {**document, "archived_at": archived_at},
+                upsert=True
+            )
+            for document in documents
+        ], ordered=False)
+        # Cada projeto só é removido se ainda for idêntico à versão copiada:
+        # as escritas em tarefas e colaboradores não alteram `updated_at`.
+        result = await collection.bulk_write([
+            DeleteOne(document) for document in documents
+        ], ordered=False)
+        archived += result.deleted_count
+        if result.deleted_count < len(documents):
+            # Projetos alterados entre a cópia e a remoção continuam ativos;
+            # suas cópias no arquivo estão desatualizadas e são descartadas.
+            not_deleted = await collection.distinct("_id", {"_id": {"$in": [
+                document["_id"] for document in documents
+            ]}})
+            await archive.delete_many({"_id": {"$in": not_deleted}})
+        if len(documents) < batch_size:
+            break
+    return archived
+
+
+async def count_archived_projects(
+    estimate: bool = False,
+    route_group: str | None = None,
+    max_time_ms: int | None = None
+) -> int:
+    """
+    Conta os projetos arquivados.
+
+    Args:
+        estimate (bool): Aceita o total aproximado dos metadados da coleção.
+        route_group (str, opcional): Grupo de rotas que define a read
+            preference da contagem.
+        max_time_ms (int, opcional): Tempo máximo da contagem no MongoDB.
+
+    Returns:
+        int: Número de projetos arquivados.
+    """
+    archive = get_archive_collection(route_group)
+    options = {"maxTimeMS": max_time_ms} if max_time_ms is not None else {}
+    if estimate:
+        return await archive.estimated_document_count(**options)
+    return await cached_count(
+        [ARCHIVE_COLLECTION, {}],
+        lambda: archive.count_documents({}, **options)
+    )
+
+
+async def find_archived_project(project_id: ObjectId) -> Project | None:
+    """
+    Busca um projeto na coleção de arquivo.
+
+    Args:
+        project_id (ObjectId): ID do projeto.
+
+    Returns:
+        Project | None: Projeto arquivado, ou None se não existir.
+    """
+    document = await get_archive_collection().find_one({"_id": project_id})
+    if not document:
+        return None
+    document.pop("archived_at", None)
+    return Project.model_validate_doc(document)
+
+
+async def run_archiver() -> None:
+    """
+    Arquiva periodicamente os projetos concluídos, a cada
+    `ARCHIVE_INTERVAL_SECONDS` segundos.
+    """
+    while True:
+        try:
+            await archive_done_projects()
+        except PyMongoError:
+            logger.exception("Project archival failed.")
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
@@ -0,0 +1,289 @@
+import asyncio
+import json
+import logging
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo.errors import OperationFailure, PyMongoError
+
+from database import get_engine
+from models import Project
+
+logger = logging.getLogger(__name__)
+
+HISTORY_SIZE = 1000
+SUBSCRIBER_QUEUE_SIZE = 100
+SNAPSHOT_LIMIT = 10000
+RETRY_DELAY_SECONDS = 1
+MAX_RETRY_DELAY_SECONDS = 60
+
+
+def _encode(value: object) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class ProjectChangeFeed:
+    """
+    Distribui as alterações da coleção `project` para clientes conectados.
+
+    Um único change stream por worker alimenta todos os assinantes, seja de
+    um projeto específico ou da coleção inteira. Cada evento leva apenas as
+    tarefas alteradas e o token de retomada do change stream, que o cliente
+    devolve ao reconectar para receber os eventos perdidos.
+
+    As tarefas alteradas são obtidas comparando o documento com a última
+    versão conhecida das tarefas do projeto. Para os projetos observados
+    essa versão é carregada na assinatura; com assinantes da coleção
+    inteira, ela é guardada no primeiro evento de cada projeto (até
+    `SNAPSHOT_LIMIT` projetos), e esse primeiro evento leva as tarefas
+    indicadas em `updateDescription` (todas, quando o array inteiro foi
+    regravado).
+    """
+
+    def __init__(self):
+        self._subscribers: dict[ObjectId | None, set[asyncio.Queue]] = {}
+        self._snapshots: OrderedDict[ObjectId, dict[ObjectId, dict]] = \
+            OrderedDict()
+        self._history: deque = deque(maxlen=HISTORY_SIZE)
+        self._resume_token: dict | None = None
+        self._watcher: asyncio.Task | None = None
+
+    async def subscribe(
+        self,
+        project_id: ObjectId | None,
+        last_event_id: str | None = None
+    ) -> asyncio.Queue:
+        """
+        Registra um assinante.
+
+        Args:
+            project_id (ObjectId | None): Projeto observado, ou None para a
+                coleção inteira.
+            last_event_id (str, opcional): Último evento recebido antes da
+                reconexão.
+
+        Returns:
+            asyncio.Queue: Fila de eventos `(id, tipo, dados)` do assinante.
+        """
+        if project_id is not None and project_id not in self._snapshots:
+            collection = get_engine().get_collection(Project)
+            document = await collection.find_one(
+                {"_id": project_id}, {"tasks": 1}
+            )
+            if project_id not in self._snapshots:
+                self._snapshots[project_id] = self._index_tasks(document or {})
+        # Sem `await` entre o replay e o registro: um evento despachado nesse
+        # intervalo não chegaria a este assinante.
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        if last_event_id is not None:
+            self._replay(queue, project_id, last_event_id)
+        self._subscribers.setdefault(project_id, set()).add(queue)
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.create_task(self._watch())
+        return queue
+
+    def unsubscribe(
+        self,
+        project_id: ObjectId | None,
+        queue: asyncio.Queue
+    ) -> None:
+        """
+        Remove um assinante.
+
+        Args:
+            project_id (ObjectId | None): Projeto observado.
+            queue (asyncio.Queue): Fila retornada por `subscribe`.
+        """
+        subscribers = self._subscribers.get(project_id, set())
+        subscribers.discard(queue)
+        if not subscribers:
+            self._subscribers.pop(project_id, None)
+            if project_id is None:
+                for key in list(self._snapshots):
+                    if key not in self._subscribers:
+                        del self._snapshots[key]
+            elif None not in self._subscribers:
+                self._snapshots.pop(project_id, None)
+
+    async def stop(self) -> None:
+        """
+        Encerra o change stream.
+        """
+        if self._watcher is None:
+            return
+        self._watcher.cancel()
+        try:
+            await self._watcher
+        except asyncio.CancelledError:
+            pass
+        self._watcher = None
+
+    def _replay(
+        self,
+        queue: asyncio.Queue,
+        project_id: ObjectId | None,
+        last_event_id: str
+    ) -> None:
+        tokens = [event[0] for event in self._history]
+        if last_event_id not in tokens:
+            queue.put_nowait((last_event_id, "resync", "{}"))
+            return
+        start = tokens.index(last_event_id) + 1
+        backlog = [
+            (token, event_type, data)
+            for token, event_project_id, event_type, data in
+            list(self._history)[start:]
+            if project_id is None or project_id == event_project_id
+        ]
+        if len(backlog) > queue.maxsize:
+            queue.put_nowait((backlog[-1][0], "resync", "{}"))
+            return
+        for event in backlog:
+            queue.put_nowait(event)
+
+    async def _watch(self) -> None:
+        collection = get_engine().get_collection(Project)
+        failures = 0
+        while True:
+            try:
+                async with collection.watch(
+                    full_document="updateLookup",
+                    resume_after=self._resume_token
+                ) as stream:
+                    async for change in stream:
+                        if change["operationType"] == "invalidate":
+                            logger.warning("Project change stream invalidated.")
+                            self._restart()
+                            break
+                        failures = 0
+                        self._resume_token = change["_id"]
+                        self._dispatch(change)
+                    continue
+            except OperationFailure:
+                # Erros do servidor que chegam até aqui não são retomáveis
+                # (por exemplo ChangeStreamHistoryLost, código 286): reabrir
+                # com o mesmo token falharia sempre. Os assinantes só
+                # precisam recarregar quando um token é de fato descartado;
+                # erros permanentes (como um servidor sem replica set) apenas
+                # espaçam as novas tentativas.
+                logger.exception("Project change stream cannot be resumed.")
+                if self._resume_token is not None:
+                    self._restart()
+            except PyMongoError:
+                logger.exception("Project change stream interrupted.")
+            failures += 1
+            await asyncio.sleep(min(
+                RETRY_DELAY_SECONDS * 2 ** (failures - 1),
+                MAX_RETRY_DELAY_SECONDS
+            ))
+
+    def _restart(self) -> None:
+        """
+        Descarta o token de retomada e o histórico, que não valem para o novo
+        change stream, e pede a todos os assinantes que recarreguem os
+        projetos.
+        """
+        self._resume_token = None
+        self._history.clear()
+        for subscribers in self._subscribers.values():
+            for queue in subscribers:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(("", "resync", "{}"))
+
+    def _remember(
+        self,
+        project_id: ObjectId,
+        tasks: dict[ObjectId, dict]
+    ) -> None:
+        self._snapshots[project_id] = tasks
+        self._snapshots.move_to_end(project_id)
+        if len(self._snapshots) <= SNAPSHOT_LIMIT:
+            return
+        for key in self._snapshots:
+            if key not in self._subscribers:
+                del self._snapshots[key]
+                break
+
+    @staticmethod
+    def _index_tasks(document: dict) -> dict[ObjectId, dict]:
+        return {task["id"]: task for task in document.get("tasks") or []}
+
+    def _dispatch(self, change: dict) -> None:
+        operation = change["operationType"]
+        if operation not in ("insert", "replace", "update", "delete"):
+            return
+        project_id = change["documentKey"]["_id"]
+        event = {"project_id": project_id}
+
+        if operation == "delete":
+            event_type = "delete"
+            self._snapshots.pop(project_id, None)
+        else:
+            document = change.get("fullDocument")
+            if document is None:
+                return
+            event_type = operation
+            tasks = self._index_tasks(document)
+            previous = self._snapshots.get(project_id)
+            if previous is not None:
+                event["tasks"] = [
+                    task for task_id, task in tasks.items()
+                    if previous.get(task_id) != task
+                ]
+                event["removed_task_ids"] = [
+                    task_id for task_id in previous if task_id not in tasks
+                ]
+                self._remember(project_id, tasks)
+            else:
+                event["tasks"] = self._changed_tasks(change, document)
+                if None in self._subscribers:
+                    self._remember(project_id, tasks)
+            if operation == "update":
+                updated = change["updateDescription"]["updatedFields"]
+                event["fields"] = {
+                    key: value for key, value in updated.items()
+                    if key.split(".")[0] != "tasks"
+                }
+            else:
+                event["fields"] = {
+                    key: value for key, value in document.items()
+                    if key not in ("_id", "tasks")
+                }
+            if not (event["tasks"] or event.get("removed_task_ids")
+                    or event["fields"]):
+                return
+
+        token = change["_id"]["_data"]
+        data = json.dumps(event, default=_encode)
+        self._history.append((token, project_id, event_type, data))
+        for key in (project_id, None):
+            for queue in self._subscribers.get(key, set()):
+                if queue.full():
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait((token, "resync", "{}"))
+                else:
+                    queue.put_nowait((token, event_type, data))
+
+    @staticmethod
+    def _changed_tasks(change: dict, document: dict) -> list[dict]:
+        tasks = document.get("tasks") or []
+        if change["operationType"] != "update":
+            return tasks
+        indexes = set()
+        for key in change["updateDescription"]["updatedFields"]:
+            path = key.split(".")
+            if path[0] != "tasks":
+                continue
+            if len(path) == 1 or not path[1].isdigit():
+                return tasks
+            indexes.add(int(path[1]))
+        return [tasks[index] for index in sorted(indexes)
+                if index < len(tasks)]
+
+
+project_change_feed = ProjectChangeFeed()
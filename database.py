@@ -1,14 +1,133 @@
+from bson import json_util
 from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorClient
-from odmantic import AIOEngine
+from odmantic import AIOEngine, Model
 import os
+import time
+from typing import Awaitable, Callable
+
+from models import Project
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+FANOUT_BATCH_SIZE = int(os.getenv("FANOUT_BATCH_SIZE", "500"))
+COUNT_CACHE_TTL_SECONDS = float(os.getenv("COUNT_CACHE_TTL_SECONDS", "10"))
+COUNT_CACHE_MAX_ENTRIES = 1024
+
+DATABASE_NAME = "db_projects"
+
 client = AsyncIOMotorClient(DATABASE_URL)
-engine = AIOEngine(client=client, database="db_projects")
+engine = AIOEngine(client=client, database=DATABASE_NAME)
+
+_read_clients: dict[tuple[str, int | None], AsyncIOMotorClient] = {}
+_read_engines: dict[str, AIOEngine] = {}
+_count_cache: dict[str, tuple[float, int]] = {}
+
+
+def get_engine(route_group: str | None = None) -> AIOEngine:
+    """
+    Retorna o engine de um grupo de rotas.
+
+    Sem grupo, ou quando o grupo não configura `READ_PREFERENCE_<GRUPO>`, o
+    engine lê do primário. Caso contrário o engine usa um cliente com a read
+    preference do grupo e, se definido, `MAX_STALENESS_SECONDS_<GRUPO>`.
+
+    Args:
+        route_group (str, opcional): Nome do grupo de rotas.
+
+    Returns:
+        AIOEngine: Engine do grupo.
+    """
+    if route_group is None:
+        return engine
+    if route_group not in _read_engines:
+        group = route_group.upper()
+        mode = os.getenv(f"READ_PREFERENCE_{group}", "primary")
+        staleness = os.getenv(f"MAX_STALENESS_SECONDS_{group}")
+        max_staleness = int(staleness) if staleness else None
+        if mode == "primary":
+            _read_engines[route_group] = engine
+        else:
+            key = (mode, max_staleness)
+            if key not in _read_clients:
+                options = {"readPreference": mode}
+                if max_staleness is not None:
+                    options["maxStalenessSeconds"] = max_staleness
+                _read_clients[key] = AsyncIOMotorClient(DATABASE_URL, **options)
+            _read_engines[route_group] = AIOEngine(
+                client=_read_clients[key], database=DATABASE_NAME
+            )
+    return _read_engines[route_group]
+
+
+async def cached_count(
+    key: object,
+    counter: Callable[[], Awaitable[int]]
+) -> int:
+    """
+    Retorna uma contagem guardada em cache por `COUNT_CACHE_TTL_SECONDS`.
+
+    Args:
+        key (object): Identificação da contagem (coleção e filtro).
+        counter (Callable): Função que executa a contagem no banco.
+
+    Returns:
+        int: Total de documentos.
+    """
+    cache_key = json_util.dumps(key, sort_keys=True)
+    now = time.monotonic()
+    cached = _count_cache.get(cache_key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    total = await counter()
+    if len(_count_cache) >= COUNT_CACHE_MAX_ENTRIES:
+        _count_cache.clear()
+    _count_cache[cache_key] = (now + COUNT_CACHE_TTL_SECONDS, total)
+    return total
+
+
+async def count_documents(
+    model: type[Model],
+    query: dict | None = None,
+    estimate: bool = False,
+    route_group: str | None = None,
+    max_time_ms: int | None = None
+) -> int:
+    """
+    Conta os documentos de uma coleção.
+
+    Sem filtro e com `estimate`, usa os metadados da coleção
+    (`estimated_document_count`); caso contrário a contagem exata é
+    guardada em cache.
+
+    Args:
+        model (type[Model]): Modelo da coleção.
+        query (dict, opcional): Filtro da contagem.
+        estimate (bool): Aceita um total aproximado.
+        route_group (str, opcional): Grupo de rotas que define a read
+            preference da contagem.
+        max_time_ms (int, opcional): Tempo máximo da contagem no MongoDB.
+
+    Returns:
+        int: Total de documentos.
+    """
+    collection = get_engine(route_group).get_collection(model)
+    options = {"maxTimeMS": max_time_ms} if max_time_ms is not None else {}
+    if estimate and not query:
+        return await collection.estimated_document_count(**options)
+    return await cached_count(
+        [collection.name, query or {}],
+        lambda: collection.count_documents(query or {}, **options)
+    )
 
 
-def get_engine() -> AIOEngine:
-    return engine
+async def ensure_indexes() -> None:
+    """
+    Cria os índices usados pelas consultas sobre subdocumentos de projeto.
+    """
+    project_collection = engine.get_collection(Project)
+    await project_collection.create_index("tasks.collaborators.id")
+    await project_collection.create_index("tasks.collaborators.email")
+    await project_collection.create_index("tasks.status")
+    await project_collection.create_index([("status", 1), ("updated_at", 1)])
@@ -1,7 +1,52 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
 
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from pymongo.errors import ExecutionTimeout
+
+from admission import overloaded
 from api.controller import api_router
+from archive import ARCHIVE_INTERVAL_SECONDS, ensure_archive_collection, run_archiver
+from change_feed import project_change_feed
+from database import ensure_indexes
+from write_behind import task_write_buffer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await ensure_indexes()
+    await ensure_archive_collection()
+    archiver = None
+    if ARCHIVE_INTERVAL_SECONDS > 0:
+        archiver = asyncio.create_task(run_archiver())
+    yield
+    if archiver is not None:
+        archiver.cancel()
+        try:
+            await archiver
+        except asyncio.CancelledError:
+            pass
+    await task_write_buffer.stop()
+    await project_change_feed.stop()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(api_router)
+
+
+@app.exception_handler(ExecutionTimeout)
+async def execution_timeout_handler(
+    request: Request,
+    exc: ExecutionTimeout
+) -> JSONResponse:
+    """
+    Responde 503 quando uma consulta excede o `maxTimeMS` da rota.
+    """
+    error = overloaded()
+    return JSONResponse(
+        status_code=error.status_code,
+        content={"detail": "Query time budget exceeded, try again later."},
+        headers=error.headers
+    )
@@ -1,4 +1,5 @@
 from odmantic import Model
+from pydantic import BaseModel
 from enum import Enum
 from datetime import datetime, timezone
 
@@ -31,3 +32,16 @@ class Project(Model):
     updated_at: datetime = datetime.now(timezone.utc)
     status: StatusEnum = StatusEnum.NOT_DONE
     tasks: list[Task] = []
+
+
+class ProjectFilter(BaseModel):
+    ids: list[str] | None = None
+    status: StatusEnum | None = None
+    name: str | None = None
+    updated_before: datetime | None = None
+
+
+class ProjectStatusTransition(BaseModel):
+    filter: ProjectFilter
+    status: StatusEnum
+    cascade_tasks: bool = False
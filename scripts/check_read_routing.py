@@ -0,0 +1,93 @@
+"""
+Verifica, contra o replica set de `docker-compose.replicaset.yml`, que as
+rotas de estatística leem de um secundário e não do primário.
+
+Uso:
+    docker compose -f docker-compose.replicaset.yml up -d
+    python scripts/check_read_routing.py
+
+Termina com código 0 se a agregação aparecer no profiler de um secundário e
+não no do primário, e com código 1 caso contrário.
+"""
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from pymongo import MongoClient, WriteConcern
+
+MEMBERS = ["localhost:27017", "localhost:27018", "localhost:27019"]
+DATABASE_URL = (
+    "mongodb://" + ",".join(MEMBERS) + "/?replicaSet=rs0"
+)
+
+os.environ["DATABASE_URL"] = DATABASE_URL
+os.environ["READ_PREFERENCE_STATISTIC"] = "secondaryPreferred"
+os.environ["MAX_STALENESS_SECONDS_STATISTIC"] = "90"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from database import DATABASE_NAME  # noqa: E402
+from main import app  # noqa: E402
+
+
+def _aggregations_since(member: MongoClient, since: datetime) -> int:
+    return member[DATABASE_NAME]["system.profile"].count_documents({
+        "ns": f"{DATABASE_NAME}.project",
+        "command.aggregate": "project",
+        "ts": {"$gte": since}
+    })
+
+
+def main() -> int:
+    members = {
+        host: MongoClient(host, directConnection=True) for host in MEMBERS
+    }
+    primary = next(
+        host for host, member in members.items()
+        if member.admin.command("hello")["isWritablePrimary"]
+    )
+
+    client = MongoClient(DATABASE_URL)
+    client[DATABASE_NAME].get_collection(
+        "project", write_concern=WriteConcern(w=len(MEMBERS))
+    ).insert_one({
+        "name": "read-routing-check",
+        "description": "",
+        "tasks": []
+    })
+
+    for member in members.values():
+        member[DATABASE_NAME].command("profile", 2)
+    since = datetime.now(timezone.utc)
+    try:
+        with TestClient(app) as api:
+            response = api.get("/statistic/total/tasks/by/project")
+            response.raise_for_status()
+        counts = {
+            host: _aggregations_since(member, since)
+            for host, member in members.items()
+        }
+    finally:
+        for member in members.values():
+            member[DATABASE_NAME].command("profile", 0)
+        client[DATABASE_NAME]["project"].delete_many(
+            {"name": "read-routing-check"}
+        )
+
+    for host, count in counts.items():
+        role = "primary" if host == primary else "secondary"
+        print(f"{host} ({role}): {count} aggregation(s)")
+    on_secondary = sum(
+        count for host, count in counts.items() if host != primary
+    )
+    if counts[primary] == 0 and on_secondary > 0:
+        print("OK: statistic route read from a secondary.")
+        return 0
+    print("FAIL: statistic route did not read from a secondary.")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
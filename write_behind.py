@@ -0,0 +1,184 @@
+import asyncio
+import os
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, WriteError
+
+from database import get_engine
+from models import Project
+
+TASK_WRITE_BEHIND = os.getenv("TASK_WRITE_BEHIND", "false").lower() == "true"
+TASK_WRITE_BEHIND_FLUSH_MS = int(os.getenv("TASK_WRITE_BEHIND_FLUSH_MS", "50"))
+TASK_WRITE_BEHIND_MAX_BATCH = int(
+    os.getenv("TASK_WRITE_BEHIND_MAX_BATCH", "500")
+)
+
+
+class TaskWriteBuffer:
+    """
+    Agrupa atualizações de campos de tarefas em escritas `bulk_write`.
+
+    As atualizações recebidas dentro de uma janela de `flush_interval`
+    segundos (ou até `max_batch_size` atualizações) são mescladas por
+    projeto e por tarefa e gravadas com um `$set` por projeto, usando
+    `arrayFilters` para localizar as tarefas. Cada chamada a `submit` só
+    retorna depois que o lote que a contém foi gravado; se a operação de um
+    projeto falhar, apenas as atualizações desse projeto recebem o erro.
+    """
+
+    def __init__(self, flush_interval: float, max_batch_size: int):
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker: asyncio.Task | None = None
+        self._metrics = {
+            "updates": 0,
+            "flushes": 0,
+            "operations": 0,
+            "last_batch_size": 0,
+            "largest_batch_size": 0
+        }
+
+    async def submit(
+        self,
+        project_id: ObjectId,
+        task_id: ObjectId,
+        changes: dict
+    ) -> dict | None:
+        """
+        Enfileira a atualização de uma tarefa e aguarda a gravação do lote.
+
+        Args:
+            project_id (ObjectId): ID do projeto.
+            task_id (ObjectId): ID da tarefa.
+            changes (dict): Campos da tarefa a atualizar.
+
+        Returns:
+            dict | None: Documento do projeto após a gravação, ou None se o
+            projeto não existir.
+        """
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((project_id, task_id, changes, future))
+        return await future
+
+    async def stop(self) -> None:
+        """
+        Grava as atualizações pendentes e encerra o worker.
+        """
+        if self._worker is None or self._worker.done():
+            return
+        await self._queue.put(None)
+        await self._worker
+        self._worker = None
+
+    def metrics(self) -> dict:
+        """
+        Retorna as métricas de tamanho dos lotes gravados.
+        """
+        flushes = self._metrics["flushes"]
+        return {
+            **self._metrics,
+            "average_batch_size":
+                self._metrics["updates"] / flushes if flushes else 0,
+            "pending": self._queue.qsize(),
+            "flush_interval_ms": int(self.flush_interval * 1000),
+            "max_batch_size": self.max_batch_size
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list) -> None:
+        pending: dict[ObjectId, dict[ObjectId, dict]] = {}
+        for project_id, task_id, changes, _ in batch:
+            pending.setdefault(project_id, {}) \
+                .setdefault(task_id, {}) \
+                .update(changes)
+
+        operations = []
+        operation_projects = []
+        for project_id, tasks in pending.items():
+            fields = {}
+            array_filters = []
+            for index, (task_id, changes) in enumerate(tasks.items()):
+                array_filters.append({f"t{index}.id": task_id})
+                for key, value in changes.items():
+                    fields[f"tasks.$[t{index}].{key}"] = value
+            operations.append(UpdateOne(
+                {"_id": project_id},
+                {"$set": fields},
+                array_filters=array_filters
+            ))
+            operation_projects.append(project_id)
+
+        collection = get_engine().get_collection(Project)
+        failed: dict[ObjectId, Exception] = {}
+        try:
+            try:
+                await collection.bulk_write(operations, ordered=False)
+            except BulkWriteError as error:
+                for write_error in error.details.get("writeErrors", []):
+                    failed[operation_projects[write_error["index"]]] = \
+                        WriteError(
+                            write_error.get("errmsg"),
+                            write_error.get("code"),
+                            write_error
+                        )
+            projects = {
+                document["_id"]: document
+                async for document in collection.find(
+                    {"_id": {"$in": [
+                        project_id for project_id in pending
+                        if project_id not in failed
+                    ]}}
+                )
+            }
+        except Exception as error:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        self._metrics["updates"] += len(batch)
+        self._metrics["flushes"] += 1
+        self._metrics["operations"] += len(operations)
+        self._metrics["last_batch_size"] = len(batch)
+        self._metrics["largest_batch_size"] = max(
+            self._metrics["largest_batch_size"], len(batch)
+        )
+        for project_id, _, _, future in batch:
+            if future.done():
+                continue
+            if project_id in failed:
+                future.set_exception(failed[project_id])
+            else:
+                future.set_result(projects.get(project_id))
+
+
+task_write_buffer = TaskWriteBuffer(
+    flush_interval=TASK_WRITE_BEHIND_FLUSH_MS / 1000,
+    max_batch_size=TASK_WRITE_BEHIND_MAX_BATCH
+)